@@ -2,35 +2,161 @@ import fitz  # PyMuPDF for PDF text extraction
 import sympy
 import gradio as gr
 import re
+import os
+import math
+import pickle
+import sqlite3
+import functools
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+try:
+    import symengine as se  # C++ backend for the common algebraic cases
+except ImportError:
+    se = None
+
+try:
+    from symjit import compile_func  # optional: native code for probe evaluation
+except ImportError:
+    compile_func = None
+
+# ---------- Patterns ----------
+_PREFIX_RE = re.compile(r'^[A-Za-z\s]*=')  # prefixes like R=
+# teacher sheet, on stripped lines: "R =" starts an answer (an empty one ends the previous
+# answer, and its value may sit on the next "= ..." line), a bare "=" line is noise, and
+# "= ..." otherwise continues the previous answer
+_BLANK_LINES_RE = re.compile(r'\s*\n\s*')
+_R_VALUE_NEXT_RE = re.compile(r'^R ?=\n=[^\S\n]*(?=[^=\s])', re.MULTILINE)
+_R_PREFIX_RE = re.compile(r'^R ?=[^\S\n]*', re.MULTILINE)
+_LONE_EQ_RE = re.compile(r'^=(?:\n|\Z)', re.MULTILINE)
+_EQ_CONT_RE = re.compile(r'(?<=[^\n])\n=[^\S\n]*')
+# numerator / fraction bar / denominator on three consecutive lines
+_FRAC_RE = re.compile(r'^(.*)\n[^\S\n]*[-=─_]{3,}[^\S\n]*\n(.*)$', re.MULTILINE)
+
+# ---------- Bounded Cache ----------
+class LRUCache:
+    """
+    Thread-safe mapping that evicts its least recently used entries past maxsize.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
 
 # ---------- Storage ----------
+DB_PATH = os.environ.get("RESULTS_DB", "results.db")
+SCHEME_NAME = "default"
+RESULT_CACHE_SIZE = 10000
+
+# Recent results in memory; SQLite keeps every roll number, including evicted ones
+_result_cache = LRUCache(RESULT_CACHE_SIZE)
+
 marking_scheme = {}
-results = {}
+
+# Guards marking_scheme rebinding and the shared SQLite connection.
+# Readers take a snapshot under the lock and do the heavy work outside it.
+_lock = threading.RLock()
+
+conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+conn.execute("PRAGMA journal_mode=WAL")
+conn.execute("CREATE TABLE IF NOT EXISTS results (roll TEXT PRIMARY KEY, total NUMERIC, details BLOB)")
+conn.execute("CREATE TABLE IF NOT EXISTS schemes (name TEXT PRIMARY KEY, rows BLOB)")
+conn.commit()
+
+
+def store_result(roll_no, total, details):
+    blob = pickle.dumps(details)
+    # The cache is written under the same lock as the row, so the two can't disagree
+    with _lock:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (roll, total, details) VALUES (?, ?, ?)",
+                (roll_no, total, blob),
+            )
+        _result_cache[roll_no] = {"total": total, "details": details}
+
+
+def load_result(roll_no):
+    data = _result_cache.get(roll_no)
+    if data is not None:
+        return data
+    # Filling the cache under the lock keeps a concurrent store_result from being undone
+    with _lock:
+        row = conn.execute("SELECT total, details FROM results WHERE roll = ?", (roll_no,)).fetchone()
+        if row is None:
+            return None
+        data = {"total": row[0], "details": pickle.loads(row[1])}
+        _result_cache[roll_no] = data
+    return data
+
+
+def store_scheme(scheme, name=SCHEME_NAME):
+    blob = pickle.dumps(scheme)
+    with _lock, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO schemes (name, rows) VALUES (?, ?)",
+            (name, blob),
+        )
+
+
+def load_scheme(name=SCHEME_NAME):
+    with _lock:
+        row = conn.execute("SELECT rows FROM schemes WHERE name = ?", (name,)).fetchone()
+    return pickle.loads(row[0]) if row else None
 
 
 # ---------- PDF Extraction ----------
+def _page_text(page):
+    # Text blocks in reading order (top-to-bottom, then left-to-right), so multi-column
+    # pages come out right; image blocks (type 1) are skipped
+    return "\n".join(b[4].strip() for b in page.get_text("blocks", sort=True) if b[6] == 0)
+
+
 def extract_latex_from_pdf(pdf_file):
-    text = ""
     try:
         # Handle Gradio file type (dict with "name")
         if isinstance(pdf_file, dict) and "name" in pdf_file:
             pdf_file = pdf_file["name"]
         pdf_file = str(pdf_file)
 
-        with fitz.open(pdf_file) as pdf:
-            for page in pdf:
-                text += page.get_text("text") + "\n"
+        # Keyed on mtime/size so a changed file on disk is re-read
+        stat = os.stat(pdf_file)
+        return _extract_cached(pdf_file, stat.st_mtime_ns, stat.st_size)
     except Exception as e:
         return f"ERROR reading PDF: {e}"
-    return text.strip()
+
+
+@functools.lru_cache(maxsize=64)
+def _extract_cached(pdf_file, mtime, size):
+    with fitz.open(pdf_file) as pdf:
+        return "\n".join(_page_text(page) for page in pdf).strip()
 
 
 # ---------- Clean Expressions ----------
 def clean_expression(expr):
-    expr = expr.strip()
-    expr = re.sub(r'^[A-Za-z\s]*=', '', expr)  # remove prefixes like R=
-    expr = expr.replace("^", "**")  # convert power to Python
-    return expr.strip()
+    # remove prefixes like R=, convert power to Python
+    return _PREFIX_RE.sub('', expr.strip()).replace("^", "**").strip()
 
 
 # ---------- Combine Fractions ----------
@@ -38,22 +164,16 @@ def combine_fractions(lines):
     """
     Merge numerator, line, denominator into a single fraction expression if detected.
     """
-    new_lines = []
-    skip_next = False
-    for i in range(len(lines)):
-        if skip_next:
-            skip_next = False
-            continue
+    if not lines:
+        return []
+    return combine_fractions_text("\n".join(lines)).split("\n")
 
-        if re.fullmatch(r"[-=─_]{3,}", lines[i].strip()) and i > 0 and i < len(lines) - 1:
-            numerator = lines[i - 1].strip()
-            denominator = lines[i + 1].strip()
-            fraction_expr = f"({numerator})/({denominator})"
-            new_lines[-1] = fraction_expr
-            skip_next = True
-        else:
-            new_lines.append(lines[i])
-    return new_lines
+
+def combine_fractions_text(text):
+    """
+    Same as combine_fractions, on newline-separated text.
+    """
+    return _FRAC_RE.sub(lambda m: f"({m.group(1).strip()})/({m.group(2).strip()})", text)
 
 
 # ---------- Parse Marking Scheme ----------
@@ -81,116 +201,423 @@ def process_teacher_pdf(pdf_file):
     if text.startswith("ERROR"):
         return [[text, text, 0, "expression", 0]]
 
-    lines = text.splitlines()
-    answers = []
-    buffer = ""
+    return parse_marking_scheme(teacher_answers(text))
+
+
+def teacher_answers(text):
+    """
+    Split the text of a teacher's answer sheet into one answer per question.
+    """
+    text = _BLANK_LINES_RE.sub("\n", "\n".join(text.splitlines()).strip())
+    text = _R_VALUE_NEXT_RE.sub("", text)
+    # An empty "R =" line is left blank, so it still ends the answer before it
+    text = _R_PREFIX_RE.sub("", text)
+    text = _LONE_EQ_RE.sub("", text)
+    text = _EQ_CONT_RE.sub(" ", text)
+    return [answer for answer in text.split("\n") if answer]
+
+
+# ---------- Expression Cache ----------
+@functools.lru_cache(maxsize=4096)
+def _cached_sympify(s):
+    return sympy.sympify(s)
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_simplify(s):
+    return sympy.simplify(_cached_sympify(s))
+
+
+def _to_float(s):
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+def float_match(student_ans, expected_float, tol):
+    """
+    Plain numbers on both sides: compare directly. None if either isn't one.
+    """
+    a = _to_float(student_ans)
+    if a is None or expected_float is None:
+        return None
+    if not (math.isfinite(a) and math.isfinite(expected_float)):
+        return None
+    if a == expected_float:
+        return True
+    # Without a usable tolerance let SymPy decide, as it did before this shortcut
+    if tol is None or not math.isfinite(tol):
+        return None
+    return abs(a - expected_float) <= tol
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_se_sympify(s):
+    # Convert from the SymPy parse: SymEngine's own parser reads input differently
+    # ("e" as Euler's number, "2x" as 2*x)
+    return se.sympify(_cached_sympify(s))
+
+
+def symengine_match(student_ans, expected, tol):
+    """
+    Fast equivalence check with SymEngine.
+    Returns True when the answers match; None when SymEngine can't decide and SymPy should.
+    """
+    if se is None:
+        return None
+    try:
+        expr_student = _cached_se_sympify(student_ans)
+        expr_expected = _cached_se_sympify(expected)
+        if se.expand(expr_student - expr_expected) == 0:
+            return True
+        if not expr_student.free_symbols and not expr_expected.free_symbols:
+            if abs(float(expr_student) - float(expr_expected)) <= tol:
+                return True
+    except Exception:
+        pass  # piecewise, special functions, ... -> let SymPy handle it
+    return None
+
+
+# ---------- Numeric Probing ----------
+N_PROBES = 6
+
+
+@functools.lru_cache(maxsize=None)
+def _probe_args(n_symbols):
+    # Same deterministic points for expected and student: both signs (so Abs(x) vs x
+    # differ), magnitudes in [0.5, 2.5] away from 0/1 special cases
+    rng = np.random.default_rng(n_symbols)
+    return tuple(
+        rng.choice([-1.0, 1.0], N_PROBES) * rng.uniform(0.5, 2.5, N_PROBES)
+        for _ in range(n_symbols)
+    )
+
+
+def _evaluate_probes(exprs, symbols):
+    """
+    Raw values of each expression at the probe points, one entry per expression.
+    """
+    args = _probe_args(len(symbols))
+    # symjit compiles straight to machine code (SIMD across the probe points); its output
+    # is only used when it has the expected shape, otherwise lambdify to NumPy takes over
+    if compile_func is not None and symbols:
+        try:
+            values = np.asarray(compile_func(list(symbols), list(exprs), use_simd=True)(*args))
+            if values.shape == (len(exprs), N_PROBES):
+                return values
+        except Exception:
+            pass
+    # A list rather than a Matrix: constant entries would make a ragged Matrix result
+    return sympy.lambdify(symbols, list(exprs), modules="numpy")(*args)
+
+
+def batch_probe_values(exprs, symbols):
+    """
+    Evaluate a list of expressions at the probe points with one compiled call.
+    Returns an (len(exprs), N_PROBES) array; rows that aren't finite reals are NaN.
+    """
+    out = np.full((len(exprs), N_PROBES), np.nan)
+    with np.errstate(all="ignore"):
+        for k, values in enumerate(_evaluate_probes(exprs, symbols)):
+            values = np.asarray(values)
+            if not np.iscomplexobj(values):
+                out[k] = np.broadcast_to(values, (N_PROBES,))
+    out[~np.isfinite(out).all(axis=1)] = np.nan
+    return out
+
+
+def _safe_probe_values(exprs, symbols):
+    # One bad expression (e.g. no NumPy equivalent) shouldn't sink the whole batch
+    try:
+        return batch_probe_values(exprs, symbols)
+    except Exception:
+        out = np.full((len(exprs), N_PROBES), np.nan)
+        for k, expr in enumerate(exprs):
+            try:
+                out[k] = batch_probe_values([expr], symbols)[0]
+            except Exception:
+                pass
+        return out
 
-    for l in lines:
-        l = l.strip()
-        if not l:
+
+def numeric_verdicts(scheme, student_answers):
+    """
+    Compare every expression row against the student's answers at the probe points at once.
+    Returns one verdict per row. Probes can only rule an answer out (floor(x)+1 and
+    ceiling(x) agree at every non-integer point), so a verdict is False when the numbers
+    differ and None when SymPy has to decide.
+    """
+    compiled = scheme["compiled"]
+    verdicts = [None] * len(compiled)
+    symbols = scheme["symbols"]
+    known = set(symbols)
+
+    idx, exprs = [], []
+    for i, row in enumerate(compiled):
+        if row["probe_values"] is None or i >= len(student_answers):
             continue
-        if l.startswith("R =") or l.startswith("R="):
-            l = l.split("=", 1)[1].strip()
-        if l == "=":
+        try:
+            expr_student = _cached_sympify(student_answers[i])
+        except Exception:
             continue
-        if l.startswith("=") and buffer:
-            buffer += " " + l[1:].strip()
-        else:
-            if buffer:
-                answers.append(buffer)
-            buffer = l
-    if buffer:
-        answers.append(buffer)
+        if expr_student.free_symbols <= known:
+            idx.append(i)
+            exprs.append(expr_student)
+    if not idx:
+        return verdicts
+
+    got = _safe_probe_values(exprs, symbols)
+    expected = np.array([compiled[i]["probe_values"] for i in idx])
+    tol = scheme["scheme"]["tolerance"].values[idx][:, None]
+
+    diff = np.abs(got - expected)
+    valid = np.isfinite(got).all(axis=1)
+    # Only reject when the gap is clearly more than float noise
+    far = (diff > tol + 1e-9 * np.maximum(1.0, np.abs(expected))).any(axis=1)
+
+    for k, i in enumerate(idx):
+        if valid[k] and far[k]:
+            verdicts[i] = False
+    return verdicts
 
-    return parse_marking_scheme(answers)
+
+SCHEME_COLUMNS = ["line_text", "expected_answer", "max_marks", "compare_type", "tolerance"]
+
+
+def scheme_frame(df):
+    """
+    Typed DataFrame of the marking scheme, from a Gradio DataFrame or a plain list of rows.
+    """
+    if hasattr(df, "columns") and set(SCHEME_COLUMNS) <= set(df.columns):
+        frame = df[SCHEME_COLUMNS].copy()
+    else:
+        frame = pd.DataFrame(df.values.tolist() if hasattr(df, "values") else list(df), columns=SCHEME_COLUMNS)
+    # A blank tolerance cell ('' or None) means no tolerance; anything else must be a number
+    tol = frame["tolerance"]
+    frame["tolerance"] = tol.mask(tol.isna() | (tol.astype(str).str.strip() == ""), 0)
+    frame = frame.astype({"expected_answer": str, "compare_type": str, "tolerance": "float64"})
+    marks = frame["max_marks"].astype("float64")
+    if marks.isna().any():
+        raise ValueError("every row needs max_marks")
+    frame["max_marks"] = marks.astype("int32") if (marks % 1 == 0).all() else marks
+    return frame
+
+
+def compile_scheme_row(expected_answer, max_marks, compare_type, tol):
+    """
+    Pre-compute everything about a marking scheme row that does not depend on the student.
+    "expected" is the cleaned answer; student answers are cleaned the same way up front.
+    """
+    expected = clean_expression(expected_answer)
+    compiled = {
+        "expected": expected,
+        "expected_text_norm": expected.lower(),
+        "expected_float": _to_float(expected),
+        "simplified": None,
+        "evalf": None,
+        "probe_values": None,
+        "max_marks": max_marks,
+        "compare_type": compare_type,
+        "tol": tol,
+    }
+    if compiled["compare_type"] == "expression":
+        try:
+            compiled["simplified"] = _cached_simplify(expected)
+            if not compiled["simplified"].free_symbols:
+                compiled["evalf"] = float(compiled["simplified"].evalf())
+        except Exception:
+            pass  # reported per student as a parse error
+    return compiled
+
+
+# ---------- Comparators ----------
+EQUIVALENCE_CACHE_SIZE = 20000
+_equivalence_cache = LRUCache(EQUIVALENCE_CACHE_SIZE)  # equivalence_key -> matched
+
+
+def equivalence_key(row, student_ans):
+    # Structural key: rearranged forms that parse to the same tree (x+1, 1+x) share it.
+    # Not probe values - non-equivalent answers such as floor(x)+1 and ceiling(x) collide.
+    return (row["expected"], row["tol"], sympy.srepr(_cached_sympify(student_ans)))
+
+
+# Each returns (awarded, reason); verdict comes from numeric_verdicts
+def compare_text(row, student_ans, verdict=None):
+    if student_ans.lower() == row["expected_text_norm"]:
+        return row["max_marks"], ""
+    return 0, f"Expected '{row['expected']}', got '{student_ans}'"
+
+
+def compare_numeric(row, student_ans, verdict=None):
+    try:
+        if abs(float(student_ans) - row["expected_float"]) <= row["tol"]:
+            return row["max_marks"], ""
+    except (TypeError, ValueError):
+        return 0, f"Unreadable numeric answer: {student_ans}"
+    return 0, f"Expected {row['expected']}, got {student_ans}"
+
+
+def compare_expression(row, student_ans, verdict=None):
+    expected = row["expected"]
+    tol = row["tol"]
+    try:
+        # Cheapest checks first; each returns None when it can't decide
+        matched = True if expected and student_ans == expected else float_match(student_ans, row["expected_float"], tol)
+        if matched is None:
+            matched = symengine_match(student_ans, expected, tol)
+        if matched is None:
+            matched = verdict
+
+        if matched is None:
+            if row["simplified"] is None:
+                _cached_simplify(expected)  # re-raise the original parse error
+            expr_student = _cached_sympify(student_ans)
+
+            # Rearranged forms of an answer already checked for this question reuse the result
+            key = equivalence_key(row, student_ans)
+            matched = _equivalence_cache.get(key)
+            if matched is None:
+                if sympy.simplify(expr_student - row["simplified"]) == 0:
+                    matched = True
+                else:
+                    # A symbolic expected answer has no single numeric value to compare against
+                    matched = row["evalf"] is not None and abs(float(expr_student.evalf()) - row["evalf"]) <= tol
+                _equivalence_cache[key] = matched
+    except Exception as e:
+        return 0, f"Parse error: {e}"
+
+    if matched:
+        return row["max_marks"], ""
+    return 0, f"Expression differs: {student_ans}"
+
+
+COMPARATORS = {
+    "text": compare_text,
+    "numeric": compare_numeric,
+    "expression": compare_expression,
+}
+
+
+# ---------- Grading ----------
+def grade_row(job):
+    """
+    Grade one (row, student_ans, verdict) job into a result detail.
+    """
+    row, student_ans, verdict = job
+    try:
+        awarded, reason = COMPARATORS[row["compare_type"]](row, student_ans, verdict)
+        return {
+            "question": row["expected"],
+            "student_answer": student_ans,
+            "marks_awarded": awarded,
+            "max_marks": row["max_marks"],
+            "reason": reason
+        }
+    except Exception as e:
+        return {
+            "question": "Error in marking",
+            "student_answer": "",
+            "marks_awarded": 0,
+            "max_marks": row.get("max_marks", 0),
+            "reason": f"Error: {e} -> Manual inspection"
+        }
+
+
+def grade_rows(jobs):
+    """
+    Grade every job in order, in this process. Pool workers can't import "app (1).py"
+    by name, and when it runs as __main__ each one reruns the app's startup.
+    """
+    return [grade_row(job) for job in jobs]
 
 
 # ---------- Save Marking Scheme ----------
 def save_marking_scheme(df):
     global marking_scheme
-    marking_scheme = {"scheme": df}
+    try:
+        frame = scheme_frame(df)
+    except Exception as e:
+        return f"Invalid marking scheme: {e}"
+    invalid = ~frame["compare_type"].isin(list(COMPARATORS))
+    if invalid.any():
+        n = int(invalid.values.argmax())
+        return f"Invalid compare_type '{frame['compare_type'].values[n]}' in row {n + 1}. Use one of: {', '.join(COMPARATORS)}"
+    scheme = build_marking_scheme(frame)
+    with _lock:
+        marking_scheme = scheme
+        store_scheme(frame)
     return "Marking scheme saved successfully!"
 
 
+def build_marking_scheme(frame):
+    # tolist() converts whole columns to Python scalars in one go
+    compiled = [
+        compile_scheme_row(*row)
+        for row in zip(
+            frame["expected_answer"].tolist(),
+            frame["max_marks"].tolist(),
+            frame["compare_type"].tolist(),
+            frame["tolerance"].tolist(),
+        )
+    ]
+
+    # Probe every expected expression in one call over a shared symbol set
+    exprs = [c for c in compiled if c["simplified"] is not None]
+    symbols = tuple(sorted(set().union(*(c["simplified"].free_symbols for c in exprs)), key=str))
+    if exprs:
+        values = _safe_probe_values([c["simplified"] for c in exprs], symbols)
+        for c, v in zip(exprs, values):
+            c["probe_values"] = v if np.isfinite(v).all() else None
+
+    return {
+        "scheme": frame,
+        "compiled": compiled,
+        "symbols": symbols,
+    }
+
+
+def load_marking_scheme():
+    # Compiled rows hold SymPy objects, so only the scheme table is persisted
+    try:
+        scheme = load_scheme()
+        return build_marking_scheme(scheme_frame(scheme)) if scheme is not None else {}
+    except Exception:
+        return {}  # unreadable stored scheme: start empty rather than fail to boot
+
+
+marking_scheme = load_marking_scheme()
+
+
 # ---------- Evaluate Student ----------
 def evaluate_student(pdf_file, roll_no):
-    global results, marking_scheme
+    with _lock:
+        scheme = marking_scheme
     try:
-        if not marking_scheme:
+        if not scheme:
             return "No marking scheme available. Please create it first."
 
         student_text = extract_latex_from_pdf(pdf_file)
         if student_text.startswith("ERROR"):
             return f"ERROR: Could not read student PDF for {roll_no}"
 
-        student_lines = student_text.splitlines()
-        student_lines = combine_fractions(student_lines)
+        student_lines = combine_fractions_text(student_text).split("\n")
 
-        obtained = 0
-        detailed = []
+        compiled = scheme["compiled"]
+        student_answers = [clean_expression(l) for l in student_lines[:len(compiled)]]
+        try:
+            verdicts = numeric_verdicts(scheme, student_answers)
+        except Exception:
+            verdicts = [None] * len(compiled)  # fall back to symbolic checks per row
 
-        for i, scheme in enumerate(marking_scheme["scheme"]):
-            try:
-                expected = clean_expression(str(scheme[1]))
-                max_marks = scheme[2]
-                compare_type = scheme[3]
-                tol = scheme[4]
-
-                student_ans = clean_expression(student_lines[i]) if i < len(student_lines) else ""
-
-                awarded = 0
-                reason = ""
-
-                if compare_type == "text":
-                    if student_ans.strip().lower() == expected.strip().lower():
-                        awarded = max_marks
-                    else:
-                        reason = f"Expected '{expected}', got '{student_ans}'"
-
-                elif compare_type == "numeric":
-                    try:
-                        if abs(float(student_ans) - float(expected)) <= tol:
-                            awarded = max_marks
-                        else:
-                            reason = f"Expected {expected}, got {student_ans}"
-                    except:
-                        reason = f"Unreadable numeric answer: {student_ans}"
-
-                elif compare_type == "expression":
-                    try:
-                        expr_student = sympy.sympify(student_ans)
-                        expr_expected = sympy.sympify(expected)
-
-                        if sympy.simplify(expr_student - expr_expected) == 0:
-                            awarded = max_marks
-                        elif sympy.simplify(expr_student).evalf() == sympy.simplify(expr_expected).evalf():
-                            awarded = max_marks
-                        elif abs(float(expr_student.evalf()) - float(expr_expected.evalf())) <= tol:
-                            awarded = max_marks
-                        else:
-                            reason = f"Expression differs: {student_ans}"
-                    except Exception as e:
-                        reason = f"Parse error: {e}"
-
-                obtained += awarded
-                detailed.append({
-                    "question": expected,
-                    "student_answer": student_ans,
-                    "marks_awarded": awarded,
-                    "max_marks": max_marks,
-                    "reason": reason
-                })
-
-            except Exception as e:
-                detailed.append({
-                    "question": "Error in marking",
-                    "student_answer": "",
-                    "marks_awarded": 0,
-                    "max_marks": scheme[2] if len(scheme) > 2 else 0,
-                    "reason": f"Error: {e} -> Manual inspection"
-                })
-
-        results[roll_no] = {"total": obtained, "details": detailed}
+        jobs = [
+            (row, student_answers[i] if i < len(student_answers) else "", verdicts[i])
+            for i, row in enumerate(compiled)
+        ]
+        detailed = grade_rows(jobs)
+        obtained = sum(d["marks_awarded"] for d in detailed)
+
+        store_result(roll_no, obtained, detailed)
         return f"Evaluation completed for {roll_no}. Total Marks: {obtained}"
 
     except Exception as e:
@@ -199,10 +626,10 @@ def evaluate_student(pdf_file, roll_no):
 
 # ---------- Get Results ----------
 def get_result(roll_no):
-    if roll_no not in results:
+    data = load_result(roll_no)
+    if data is None:
         return "No result found for this roll number."
 
-    data = results[roll_no]
     total = data["total"]
     details = data["details"]
 
@@ -0,0 +1,16 @@
+import importlib.util
+import os
+
+import pytest
+
+APP_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "app (1).py")
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    # Keep the app's SQLite store out of the working tree
+    os.environ["RESULTS_DB"] = str(tmp_path_factory.mktemp("db") / "results.db")
+    spec = importlib.util.spec_from_file_location("app", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,51 @@
+import re
+
+import pytest
+
+
+def old_combine_fractions(lines):
+    # The original line-by-line implementation, kept as the reference
+    new_lines = []
+    skip_next = False
+    for i in range(len(lines)):
+        if skip_next:
+            skip_next = False
+            continue
+
+        if re.fullmatch(r"[-=─_]{3,}", lines[i].strip()) and i > 0 and i < len(lines) - 1:
+            numerator = lines[i - 1].strip()
+            denominator = lines[i + 1].strip()
+            new_lines[-1] = f"({numerator})/({denominator})"
+            skip_next = True
+        else:
+            new_lines.append(lines[i])
+    return new_lines
+
+
+@pytest.mark.parametrize("lines", [
+    [],
+    ["a"],
+    ["---"],
+    ["a", "---", "b"],
+    [" a ", "  ___ ", "b ", "c"],
+    ["x", "a", "====", "b", "y"],
+    ["---", "a", "b"],        # bar on the first line
+    ["a", "b", "---"],        # bar on the last line
+    ["---", "---", "x"],      # bar as numerator
+    ["", "---", ""],          # empty operands
+    ["a", "-- -", "b"],       # not a bar
+    ["a", "---", "b", "c", "---", "d"],  # consecutive fractions
+])
+def test_matches_old_semantics(app, lines):
+    assert app.combine_fractions(lines) == old_combine_fractions(lines)
+
+
+def test_bar_under_denominator_keeps_first_fraction(app):
+    # Intentional difference: the old loop folded this into (b)/(c) and dropped a
+    lines = ["a", "---", "b", "---", "c"]
+    assert old_combine_fractions(lines) == ["(b)/(c)"]
+    assert app.combine_fractions(lines) == ["(a)/(b)", "---", "c"]
+
+
+def test_text_variant(app):
+    assert app.combine_fractions_text("x\n1\n---\n2\ny") == "x\n(1)/(2)\ny"
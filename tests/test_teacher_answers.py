@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+
+def old_teacher_answers(text):
+    # The original per-line loop from process_teacher_pdf, kept as the reference
+    answers = []
+    buffer = ""
+    for l in text.splitlines():
+        l = l.strip()
+        if not l:
+            continue
+        if l.startswith("R =") or l.startswith("R="):
+            l = l.split("=", 1)[1].strip()
+        if l == "=":
+            continue
+        if l.startswith("=") and buffer:
+            buffer += " " + l[1:].strip()
+        else:
+            if buffer:
+                answers.append(buffer)
+            buffer = l
+    if buffer:
+        answers.append(buffer)
+    return answers
+
+
+def has_value_on_next_line(text):
+    # The one intentional difference: an empty "R =" followed by "= value"
+    lines = [l.strip() for l in text.splitlines() if l.strip()]
+    return any(
+        l in ("R =", "R=") and nxt.startswith("=") and nxt[1:].strip()[:1] not in ("", "=")
+        for l, nxt in zip(lines, lines[1:])
+    )
+
+
+@pytest.mark.parametrize("lines", [
+    [],
+    ["x+1"],
+    ["R = x+1", "R = 2*x"],
+    ["R=x", "= y", "=", "= z"],
+    ["  R = a  ", "", "   ", "b"],
+    ["= 2", "R =", "R == 4"],  # an empty "R =" still ends the answer before it
+    ["7", "R =", "=="],
+    ["R =", "=", "= 5"],
+    ["R =", "== 5"],
+    ["R  = a"],                 # two spaces: not an "R =" prefix
+    ["a", "R ==", "= b"],
+    ["=", "= a", "b", "R = = c"],
+])
+def test_matches_old_semantics(app, lines):
+    text = "\n".join(lines)
+    assert app.teacher_answers(text) == old_teacher_answers(text)
+
+
+def test_matches_old_semantics_on_random_sheets(app):
+    rng = random.Random(0)
+    pieces = ["R =", "R=", "R = x", "R=2", "R  = y", "R ==", "R == 4", "=", "==", "= 3", "=x",
+              "=  = z", "a", "b+1", "", "  ", " R = c "]
+    checked = 0
+    for _ in range(20000):
+        text = "\n".join(rng.choice(pieces) for _ in range(rng.randint(0, 8)))
+        if has_value_on_next_line(text):
+            continue
+        assert app.teacher_answers(text) == old_teacher_answers(text), repr(text)
+        checked += 1
+    assert checked > 10000
+
+
+def test_value_on_line_after_empty_prefix(app):
+    # Intentional difference: the old loop kept the stray "=" and emitted "= x+1"
+    text = "a\nR =\n= x+1\n= 2"
+    assert old_teacher_answers(text) == ["a", "= x+1 2"]
+    assert app.teacher_answers(text) == ["a", "x+1 2"]